@@ -0,0 +1,78 @@
+"""
+File: test_filter_pushshift_comments.py
+
+Tests for the keyword matching, reading and writing in filter_pushshift_comments.py.
+"""
+import os
+import re
+import sys
+import pytest
+import zstandard as zstd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'utils'))
+
+from filter_pushshift_comments import _read_lines, build_loose_automaton, build_matcher, filter_comments, split_on_newlines, write_comments
+
+def test_loose_automaton_gives_each_word_one_bit():
+    automaton, keyword_masks = build_loose_automaton(['meal planning', 'planning', 'macro tracking'])
+
+    assert keyword_masks == [0b11, 0b10, 0b1100]
+    assert sorted(automaton.keys()) == ['macro', 'meal', 'planning', 'tracking']
+
+def test_loose_match_requires_all_words_of_a_keyword():
+    matches = build_matcher(['meal planning'], loose_match=True)
+
+    assert matches('Planning my next meal')
+    assert not matches('Planning my week')
+    assert not matches('A big meal')
+
+def test_loose_match_does_not_combine_words_of_different_keywords():
+    matches = build_matcher(['meal planning', 'macro tracking'], loose_match=True)
+
+    assert matches('Tracking each macro')
+    assert not matches('Meal tracking')
+
+def test_exact_match_requires_the_whole_keyword():
+    matches = build_matcher(['meal planning'])
+
+    assert matches('I do MEAL PLANNING on sundays')
+    assert not matches('Planning my next meal')
+
+def test_filter_comments_without_keywords_keeps_every_comment():
+    comments = ['first', 'second']
+
+    assert build_matcher([' ', '']) is None
+    assert list(filter_comments(comments, [' ', ''])) == comments
+
+def test_filter_comments_keeps_repeated_comments():
+    comments = ['meal planning', 'nothing', 'meal planning']
+
+    assert list(filter_comments(comments, ['meal'])) == ['meal planning', 'meal planning']
+
+@pytest.mark.parametrize('comment', ['one', 'one\ntwo', 'one\n\n\ntwo\n', '\n  one  \n \n two', '', '\n\n', 'one\r\ntwo'])
+def test_split_on_newlines_matches_regex_split(comment):
+    expected = [part.strip() for part in re.split(r'\n+', comment) if part.strip()]
+
+    assert split_on_newlines(comment) == expected
+
+@pytest.mark.parametrize('compressed', [False, True])
+@pytest.mark.parametrize('trailing_newline', [False, True])
+def test_read_lines_carries_lines_over_between_chunks(tmp_path, compressed, trailing_newline):
+    lines = [b'{"body": "first"}', b'', b'{"body": "a longer second line"}', b'third']
+    data = b'\n'.join(lines) + (b'\n' if trailing_newline else b'')
+    file_path = str(tmp_path / ('sub_comments.zst' if compressed else 'sub_comments'))
+    with open(file_path, 'wb') as fp:
+        fp.write(zstd.ZstdCompressor().compress(data) if compressed else data)
+
+    assert list(_read_lines(file_path, chunk_size=5)) == lines
+
+@pytest.mark.parametrize('compress', [False, True])
+def test_write_comments(tmp_path, compress):
+    comments = [f'comment {i}' for i in range(100)]
+    file_path = str(tmp_path / ('comments.json.zst' if compress else 'comments.json'))
+
+    write_comments(iter(comments), file_path, buffer_size=64, compress=compress)
+
+    with open(file_path, 'rb') as fp:
+        data = zstd.ZstdDecompressor().stream_reader(fp).read() if compress else fp.read()
+    assert data.decode('utf-8') == '\n'.join(comments) + '\n'
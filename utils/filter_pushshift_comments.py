@@ -5,7 +5,7 @@ Author: Anjola Aina
 Date Modified: March 13th, 2025
 
 Description:
-    This script extracts and filters Reddit comments from decompressed `.zst` Pushshift data files. It first processes files to extract all comments before 
+    This script extracts and filters Reddit comments from `.zst` Pushshift data files, decompressing them as they are read. It processes files to extract all comments,
     filtering them based on specified keywords (if provided). Afterwards, it saves the extracted or filtered comments into a single JSON file. If the output
     directory is not given, it is saved inside of the input directory.
     
@@ -14,9 +14,11 @@ Description:
     - Individual file/folder extraction: Use `single_file` and `iterate_folder` scripts from Watchful1.  
 
 Features:
-    - It processes files to extract all comments.  
+    - It processes files to extract all comments, using multiple processes to process files in parallel.  
+    - Reads `.zst` files directly, without extracting them to disk first.  
+    - Optionally extracts the `.zst` comment files into the 'comments' folder of the output directory.  
     - Filters comments based on specified keywords (if provided).  
-    - Saves the extracted or filtered comments in a JSON file.  
+    - Saves the extracted or filtered comments in a JSON file, optionally compressed with zstd.  
     
 Usage Examples:
     - Extract all comments from the input directory, keeping comments with the keywords meal planning (exact and loose match) and save them to 'filtered_comments.json' in the output directory:
@@ -28,6 +30,11 @@ Usage Examples:
       ```
       python filter_pushshift_comments.py input_dir --keywords customization,goals
       ```
+    
+    - Extract all comments from the input directory and also extract the `.zst` comment files into 'out_dir/comments':
+      ```
+      python filter_pushshift_comments.py input_dir --output out_dir --extract
+      ```
 Attribution:
     - The batch decompression method for .zst files is based on this Stack Overflow post:
     https://stackoverflow.com/questions/31346790/unzip-all-zipped-files-in-a-folder-to-that-same-folder-using-python-2-7-5
@@ -35,10 +42,14 @@ Attribution:
 """
 
 import argparse
-import json
+import contextlib
+import functools
+import multiprocessing
 import os
-import re
 import sys
+from collections.abc import Callable, Iterable, Iterator
+import ahocorasick
+import orjson
 from tqdm import tqdm
 import zstandard as zstd
 
@@ -52,115 +63,325 @@ def split_on_newlines(comment: str) -> list[str]:
     Returns:
         list[str]: The new list of comments from the single comment containing multiple newlines.
     """
-    return [part.strip() for part in re.split(r'\n+', comment) if part.strip()]
+    return [part for part in map(str.strip, comment.split('\n')) if part]
+
+def normalize_keywords(keywords: Iterable[str]) -> list[str]:
+    """
+    Normalizes the keywords by lowercasing them and removing surrounding whitespace, empty keywords and duplicates.
+    The order of the remaining keywords is kept.
+
+    Args:
+        keywords (Iterable[str]): The keywords to normalize.
+
+    Returns:
+        list[str]: The normalized keywords.
+    """
+    return list(dict.fromkeys(keyword for keyword in map(str.strip, map(str.lower, keywords)) if keyword))
+
+def build_keyword_automaton(keywords: list[str]) -> ahocorasick.Automaton:
+    """
+    Builds an Aho-Corasick automaton over the lowercased keywords, so that every keyword can be searched for in a single pass over a comment.
+    Keywords sharing a prefix share the same path in the automaton's trie, and only plain integers are stored as values.
+
+    Args:
+        keywords (list[str]): The list of keywords that a comment should contain.
+
+    Returns:
+        ahocorasick.Automaton: The automaton, storing the index of the keyword for each match.
+    """
+    automaton = ahocorasick.Automaton(ahocorasick.STORE_INTS)
+    for index, keyword in enumerate(keywords):
+        automaton.add_word(keyword.lower(), index)
+    automaton.make_automaton()
+    
+    return automaton
 
-def matches_keyword(comment: list[str], keyword: str, loose_match: bool = False):
+def build_loose_automaton(keywords: list[str]) -> tuple[ahocorasick.Automaton, list[int]]:
     """
-    Checks if a comment contains the specified keyword. 
+    Builds an Aho-Corasick automaton over the unique words of the lowercased keywords, used for loose matching.
     
-    If the keyword is a single word, it will only check for an exact match.
-    Otherwise, it checks for an exact match before checking if all words in the phrase appear somewhere in the comment.
-    comments based on the domain keywords and domain feature keywords.
+    Each word is stored with its own bit, and each keyword is given a bitmask of the words it contains. A comment loosely
+    matches a keyword when every bit in the keyword's bitmask has been found in the comment.
 
     Args:
-        comment (list[str]): A Reddit comment.
-        keyword (str): The keyword to check if it exists in the comment.
-        loose_match (bool, optional): Determines whether to check for a loose match or not. Defaults to False.
+        keywords (list[str]): The list of keywords that a comment should contain.
+
+    Returns:
+        tuple[ahocorasick.Automaton, list[int]]: The automaton over the unique words and the bitmask of each keyword.
+    """
+    word_bits = {}
+    keyword_masks = []
+    for keyword in keywords:
+        mask = 0
+        for word in keyword.lower().split():
+            mask |= 1 << word_bits.setdefault(word, len(word_bits))
+        keyword_masks.append(mask)
+        
+    automaton = ahocorasick.Automaton(ahocorasick.STORE_INTS)
+    for word, bit in word_bits.items():
+        automaton.add_word(word, bit)
+    automaton.make_automaton()
+    
+    return automaton, keyword_masks
+
+def build_exact_matcher(keywords: list[str]) -> Callable[[str], bool]:
+    """
+    Builds a function that checks if a comment contains any of the keywords exactly.
+
+    Args:
+        keywords (list[str]): The normalized list of keywords, as returned by normalize_keywords. Must not be empty.
 
     Returns:
-        bool: True if the comment contains the keyword (through exact or loose matching), False otherwise.
+        Callable[[str], bool]: The function returning True if a comment contains any of the keywords, False otherwise.
     """
-    comment = comment.lower()
-    keyword = keyword.lower()
+    automaton = build_keyword_automaton(keywords)
+    min_length = min(map(len, keywords)) # A comment shorter than this cannot contain any keyword
     
-    # Exact match first
-    if keyword in comment:
-        return True
+    def matches(comment: str) -> bool:
+        lowered_comment = comment.lower()
+        # Stop at the first keyword found
+        return len(lowered_comment) >= min_length and next(automaton.iter(lowered_comment), None) is not None
     
-    # Loose match: Check if all words in the phrase appear somewhere in the comment
-    if loose_match:
-        words = keyword.split()
-        return all(word in comment for word in words)
-    else:
-        return False # return False as exact matching failed
+    return matches
 
-def filter_comments(comments_list: dict, keywords: list[str], loose_match: bool = False) -> list[str]:
+def build_loose_matcher(keywords: list[str]) -> Callable[[str], bool]:
     """
-    Filters comments based on keywords.
+    Builds a function that checks if all words in any of the keywords appear somewhere in a comment.
+
+    Args:
+        keywords (list[str]): The normalized list of keywords, as returned by normalize_keywords. Must not be empty.
+
+    Returns:
+        Callable[[str], bool]: The function returning True if a comment loosely matches any of the keywords, False otherwise.
+    """
+    automaton, keyword_masks = build_loose_automaton(keywords)
+    min_length = min(max(map(len, keyword.split())) for keyword in keywords) # A comment shorter than this cannot contain all words of any keyword
+    
+    def matches(comment: str) -> bool:
+        lowered_comment = comment.lower()
+        if len(lowered_comment) < min_length:
+            return False
+        
+        # Collect the bits of every word found, then check if any keyword has all of its words present
+        found_words = 0
+        for _, bit in automaton.iter(lowered_comment):
+            found_words |= 1 << bit
+        return any(found_words & mask == mask for mask in keyword_masks)
+    
+    return matches
+
+def build_matcher(keywords: list[str], loose_match: bool = False) -> Callable[[str], bool] | None:
+    """
+    Builds the function that checks whether a comment matches any of the keywords, choosing between exact and loose matching once.
 
     Args:
-        comments_list (dict): The dictionary containing all non bot-generated comments with their corresponding id.
         keywords (list[str]): The list of keywords that a comment should contain.
         loose_match (bool, optional): Determines whether to check for a loose match or not. Defaults to False.
 
     Returns:
-        list[str]: The list of filtered comments.
+        Callable[[str], bool] | None: The function returning True for a matching comment, or None if there are no keywords to match.
     """
-    filtered_comments = []
+    keywords = normalize_keywords(keywords)
+    if not keywords:
+        return None
     
-    for comment in tqdm(comments_list, desc='Filtering comments...'):
-        # Add comment if it matches any of the supplied keywords
-        for keyword in keywords:
-            if matches_keyword(comment, keyword, loose_match):
-                filtered_comments.append(comment)
+    matches = build_loose_matcher(keywords) if loose_match else build_exact_matcher(keywords)
+    
+    # Repeated comments (such as stock replies) are matched from the cache instead of scanned again, without removing them
+    return functools.lru_cache(maxsize=100_000)(matches)
+
+def filter_comments(comments_list: Iterable[str], keywords: list[str], loose_match: bool = False) -> Iterator[str]:
+    """
+    Filters comments based on keywords, yielding each matching comment as soon as it is found.
+    
+    If loose matching is disabled, a comment is kept when it contains any of the keywords exactly.
+    Otherwise, a comment is kept when all words in any of the keywords appear somewhere in the comment.
+
+    Args:
+        comments_list (Iterable[str]): The iterable containing all non bot-generated comments.
+        keywords (list[str]): The list of keywords that a comment should contain.
+        loose_match (bool, optional): Determines whether to check for a loose match or not. Defaults to False.
+
+    Yields:
+        str: The filtered comments.
+    """
+    matches = build_matcher(keywords, loose_match)
+    if matches is None: # Nothing to filter on, keep every comment
+        yield from comments_list
+        return
+    
+    yield from filter(matches, comments_list)
+
+def _read_lines(file_path: str, chunk_size: int = 4 * 1024 * 1024) -> Iterator[bytes]:
+    """
+    Reads the raw lines of a file containing comments. A `.zst` file is decompressed as it is read, so it never has to be extracted to disk.
+    
+    The file is read in large chunks which are split on newlines, rather than reading and allocating a buffer for each line separately.
+
+    Args:
+        file_path (str): The path of the file containing comments, either compressed (`.zst`) or decompressed.
+        chunk_size (int, optional): The number of bytes read at a time. Defaults to 4 MB.
+
+    Yields:
+        bytes: The lines of the file, without their trailing newline.
+    """
+    with open(file_path, 'rb') as fp:
+        # Pushshift dumps are compressed with a long window, which must be allowed explicitly
+        reader = zstd.ZstdDecompressor(max_window_size=2**31).stream_reader(fp) if file_path.endswith('.zst') else fp
         
-    return filtered_comments
+        buffer = b''
+        while chunk := reader.read(chunk_size):
+            lines = (buffer + chunk).split(b'\n')
+            yield from lines[:-1]
+            buffer = lines[-1] # The last line may continue in the next chunk
+            
+        if buffer:
+            yield buffer
 
-def process_comments_from_file(file_path: str, bot_author: str='AutoModerator') -> list[str]:
+def _read_comments_from_file(file_path: str, bot_author: str) -> Iterator[str]:
+    """
+    Reads all comments from a single file, yielding each part of a comment as it is read. Bot-generated comments and 'daily thread' comments are not yielded.
+    
+    Args:
+        file_path(str): The path of the file containing comments from a specific subreddit, either compressed (`.zst`) or decompressed.
+        bot_author(str): The bot author to filter out bot-generated comments.
+        
+    Yields:
+        str: The comments.
+    """
+    # Pushshift dumps are compact JSON, so most bot-generated lines can be skipped before parsing them
+    bot_marker = f'"author":"{bot_author}"'.encode('utf-8')
+    
+    # Lines are read as raw bytes, as orjson decodes the UTF-8 itself
+    for line in _read_lines(file_path):
+        if not line or bot_marker in line:
+            continue
+        try:
+            data = orjson.loads(line)
+            comment = data['body']
+            if data['author'] != bot_author and 'daily threads' not in comment.lower(): # Skip bot-generated comments
+                yield from split_on_newlines(comment)
+        except orjson.JSONDecodeError:
+            print(f'Error decoding JSON in file: {file_path}')
+
+def process_comments_from_file(file_path: str, bot_author: str='AutoModerator', keywords: list[str] | None = None, loose_match: bool = False, matches: Callable[[str], bool] | None = None) -> list[str]:
     """
     Processes all comments from a single file. Bot-generated comments and 'daily thread' comments are not appended.
     
+    If keywords are given, each comment is filtered as soon as it is read, so only the matching comments are kept. A matcher
+    built beforehand with `build_matcher` can be given instead, so that it is not rebuilt for every file.
+    
     Args:
         file_path(str): The path of the file containing comments from a specific subreddit.
         bot_author(str): The bot author to filter out bot-generated comments. Defaults to AutoModerator.
+        keywords(list[str], optional): The list of keywords that a comment should contain. Defaults to None.
+        loose_match(bool, optional): Determines whether to check for a loose match or not. Defaults to False.
+        matches(Callable[[str], bool], optional): The matcher used instead of the keywords. Defaults to None.
         
     Returns:
         list(str): The list of comments.
     """
-    comments = []
-    
-    with open(file=file_path, mode='r', encoding='utf-8') as fp:
-        for line in fp:
-            try:
-                data = json.loads(line)
-                comment = data['body']
-                if data['author'] != bot_author and 'daily threads' not in comment.lower(): # Skip bot-generated comments
-                    comment_parts = split_on_newlines(comment)
-                    for part in comment_parts:
-                            comments.append(part)
-            except json.JSONDecodeError:
-                print(f'Error decoding JSON in file: {file_path}')
-                
-    return comments
+    comments = _read_comments_from_file(file_path, bot_author)
+    if matches is not None:
+        comments = filter(matches, comments)
+    elif keywords:
+        comments = filter_comments(comments, keywords, loose_match)
+        
+    return list(comments)
+
+# The matcher of a worker process, built once per worker so it is reused across files
+_matches = None
+
+def _init_matcher(keywords: list[str] | None, loose_match: bool) -> None:
+    """
+    Builds the matcher used by every file processed in the current worker process.
+
+    Args:
+        keywords (list[str] | None): The list of keywords that a comment should contain.
+        loose_match (bool): Determines whether to check for a loose match or not.
+    """
+    global _matches
+    _matches = build_matcher(keywords, loose_match) if keywords else None
 
-def process_comments_from_folder(folder_path: str) -> list[str]:
+def _process_file(file_path: str) -> list[str]:
     """
-    Processes all comments from a single folder. Bot-generated comments and 'daily thread' comments are not appended.
+    Processes all comments from a single file in a worker process, using the matcher of the worker.
+
+    Args:
+        file_path (str): The path of the file containing comments from a specific subreddit.
+
+    Returns:
+        list[str]: The list of comments.
+    """
+    return process_comments_from_file(file_path, matches=_matches)
+
+def process_comments_from_folder(folder_path: str, keywords: list[str] | None = None, loose_match: bool = False, processes: int | None = None) -> Iterator[str]:
+    """
+    Processes all comment files (`*_comments.zst` or their decompressed `*_comments` files) from a single folder. Bot-generated
+    comments and 'daily thread' comments are not yielded.
+    
+    Each file is processed in a separate worker process, as the files are independent of each other. The matcher is built once
+    per worker rather than once per file. The comments of a file are filtered inside its worker and yielded in the same order as the
+    files, so the output is the same on every run. Only the matching comments of the files in progress are kept in memory. The
+    largest files are processed first, so that the last workers are not left with a few large files at the end.
     
     Args:
         folder_path(str): The path of the folder containing files with comments from specific subreddits.
+        keywords(list[str], optional): The list of keywords that a comment should contain. Defaults to None.
+        loose_match(bool, optional): Determines whether to check for a loose match or not. Defaults to False.
+        processes(int, optional): The number of worker processes to use. Defaults to the number of CPUs.
         
-    Returns:
-        list(str): The list of filtered comments.   
+    Yields:
+        str: The processed comments.
     """
-    all_comments = [] 
-    for file in tqdm(os.listdir(folder_path), desc='Processing comments...'):
-        file_path = os.path.join(folder_path, file)
-        comments = process_comments_from_file(file_path)
-        all_comments.extend(comments)
+    with os.scandir(folder_path) as entries:
+        file_entries = sorted((entry for entry in entries if entry.is_file() and entry.name.endswith(('_comments', '_comments.zst'))), key=lambda entry: entry.stat().st_size, reverse=True)
+    file_paths = [entry.path for entry in file_entries]
+    with multiprocessing.Pool(processes=processes, initializer=_init_matcher, initargs=(keywords, loose_match)) as pool:
+        for comments in tqdm(pool.imap(_process_file, file_paths), total=len(file_paths), desc='Processing comments...'):
+            yield from comments
+
     
-    return all_comments
+# The decompression context of a worker process, created once per worker so it is reused across files
+_dctx = None
 
+def _init_decompressor() -> None:
+    """
+    Creates the decompression context used by every file decompressed in the current worker process.
+    """
+    global _dctx
+    # Pushshift dumps are compressed with a long window, which must be allowed explicitly
+    _dctx = zstd.ZstdDecompressor(max_window_size=2**31)
+
+def decompress_zst_file(zst_file_path: str, output_dir: str, chunk_size: int = 16 * 1024 * 1024) -> None:
+    """
+    Decompresses a single .zst file into the output directory, keeping its name without the .zst extension.
+
+    Args:
+        zst_file_path (str): The path of the zipped file.
+        output_dir (str): The directory to store the unzipped file.
+        chunk_size (int, optional): The number of bytes read from and written to the files at a time. Defaults to 16 MB.
+    """
+    output_file_path = os.path.join(output_dir, os.path.basename(zst_file_path).replace('.zst', ''))
+    
+    dctx = _dctx if _dctx is not None else zstd.ZstdDecompressor(max_window_size=2**31)
     
-def decompress_zst_files(dir_path: str, output_path: str, extension: str = '.zst') -> None:
+    with open(zst_file_path, 'rb') as compressed_file:
+        with open(output_file_path, 'wb') as output_file:
+            dctx.copy_stream(compressed_file, output_file, read_size=chunk_size, write_size=chunk_size)
+
+def decompress_zst_files(dir_path: str, output_path: str, extension: str = '.zst', processes: int | None = None) -> None:
     """
-    Extracts all zip files in the specified folder path into the output path.
+    Extracts all `.zst` comment files in the specified folder path into the output path.
     If the output path does not exist, the directory is made.
+    
+    Each file is decompressed in a separate worker process.
 
     Args:
         dir_path (str): The path of the folder containing the zipped files.
-        output_path (str): The output file to store all unzipped files.
+        output_path (str): The output directory to store all unzipped files, inside its 'comments' folder.
         extension (str, optional): The extension. Defaults to '.zst'.
+        processes (int, optional): The number of worker processes to use. Defaults to the number of CPUs.
         
     Raises:
         NameError: Occurs when the dir_path does not exist.
@@ -172,34 +393,66 @@ def decompress_zst_files(dir_path: str, output_path: str, extension: str = '.zst
     if not os.path.exists(dir_path):
         raise NameError(f'{dir_path} does not exist.')
     
-    parent_dir = os.path.dirname(dir_path)
-    output_dir = os.path.join(parent_dir, os.path.basename(output_path))
+    output_dir = os.path.abspath(output_path)
 
     if not os.path.exists(output_dir):
-        os.mkdir(output_dir)
+        os.makedirs(output_dir)
     
     comments_dir = os.path.join(output_dir, 'comments')
     if not os.path.exists(comments_dir):
         os.makedirs(comments_dir)
+    
+    zst_file_entries = []
+    with os.scandir(dir_path) as entries:
+        for entry in entries:
+            if entry.is_file() and entry.name.endswith(extension):
+                # Only comment files are extracted
+                if '_comments.zst' in entry.name:
+                    zst_file_entries.append(entry)
+                else:
+                    print(f'Skipping {entry.name} as it doesn\'t match expected file patterns.')
+    
+    # The largest files are decompressed first, so that the last workers are not left with a few large files at the end
+    zst_file_paths = [entry.path for entry in sorted(zst_file_entries, key=lambda entry: entry.stat().st_size, reverse=True)]
         
     # Unzip all zipped comments in the directory
-    for item in tqdm(os.listdir(dir_path), desc='Extracting files...'):
+    with multiprocessing.Pool(processes=processes, initializer=_init_decompressor) as pool:
+        decompress = functools.partial(decompress_zst_file, output_dir=comments_dir)
+        for _ in tqdm(pool.imap_unordered(decompress, zst_file_paths), total=len(zst_file_paths), desc='Extracting files...'):
+            pass
+
+def write_comments(comments: Iterable[str], file_path: str, buffer_size: int = 8 * 1024 * 1024, compress: bool = False) -> None:
+    """
+    Writes the comments to a file, one comment per line.
+    
+    Comments are collected into a buffer and written together once the buffer holds roughly buffer_size characters,
+    rather than writing each comment separately.
+
+    Args:
+        comments (Iterable[str]): The comments to write.
+        file_path (str): The path of the file to write the comments to.
+        buffer_size (int, optional): The number of characters to collect before writing. Defaults to 8 MB.
+        compress (bool, optional): Determines whether to compress the file with zstd or not. Defaults to False.
+    """
+    buffer = []
+    size = 0
+    
+    with contextlib.ExitStack() as stack:
+        out_file = stack.enter_context(open(file_path, mode='wb'))
+        if compress:
+            # Level 3 is fast to compress and read back, and all cores are used for compression
+            out_file = stack.enter_context(zstd.ZstdCompressor(level=3, threads=-1).stream_writer(out_file, closefd=False))
         
-        if item.endswith(extension):
-            zst_file_path = os.path.join(dir_path, item)
-            
-            # Determine output path based on file type
-            if '_comments.zst' in item:
-                output_file_path = os.path.join(comments_dir, item.replace('.zst', ''))
-            else:
-                print(f'Skipping {item} as it doesn\'t match expected file patterns.')
-                continue
-            
-            # Decompress the .zst file
-            with open(zst_file_path, 'rb') as compressed_file:
-                dctx = zstd.ZstdDecompressor()
-                with open(output_file_path, 'wb') as output_file:
-                    dctx.copy_stream(compressed_file, output_file)
+        for comment in comments:
+            buffer.append(comment)
+            size += len(comment) + 1
+            if size >= buffer_size:
+                out_file.write(('\n'.join(buffer) + '\n').encode('utf-8'))
+                buffer.clear()
+                size = 0
+                
+        if buffer:
+            out_file.write(('\n'.join(buffer) + '\n').encode('utf-8'))
 
 def _list_of_strings(arg: str) -> list[str]:
     """
@@ -213,6 +466,29 @@ def _list_of_strings(arg: str) -> list[str]:
     """
     return arg.split(',')
 
+def _positive_int(arg: str) -> int:
+    """
+    Converts a string into a positive integer.
+
+    Args:
+        arg (str): The string containing the integer.
+        
+    Raises:
+        argparse.ArgumentTypeError: Occurs when the string is not a positive integer.
+
+    Returns:
+        int: The positive integer.
+    """
+    try:
+        value = int(arg)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'{arg} is not an integer.')
+    
+    if value < 1:
+        raise argparse.ArgumentTypeError(f'{arg} is not a positive integer.')
+    
+    return value
+
 if __name__ == '__main__':
     # Creating parser and adding arguments
     parser = argparse.ArgumentParser(description='This script extracts and filter comments from Pushshift dumps.\nThe input folder should contain the zst folder containing all relevant subreddits from Pushshift dumps.\nThe extracted and filtered comments will be placed in the specified output folder.\nThe --keywords option allows you to specify specific keywords that comments should contain. They should be comma separated values, such as: meal planning,calories,macro tracking\nThe --loose_match flag enables loose matching, which check if all words in the keyword appear somewhere in a comment.')
@@ -222,24 +498,27 @@ if __name__ == '__main__':
     parser.add_argument('--json_file_name', type=str, required=False, help='Name of the final file containing the extracted/filtered comments.')
     parser.add_argument('--keywords', type=_list_of_strings, required=False, help='Keywords to filter out the extracted comments. Supports a comma separated list. Case insensitive.')
     parser.add_argument('--loose_match', action='store_true', required=False, help='Enables loose matching, which check if all words in the keyword appear somewhere in a comment.')
+    parser.add_argument('--extract', action='store_true', required=False, help='Also extracts the .zst comment files into the comments folder of the output directory.')
+    parser.add_argument('--compress', action='store_true', required=False, help='Compresses the final file with zstd, adding the .zst extension to its name.')
+    parser.add_argument('--processes', type=_positive_int, required=False, help='Number of processes used to process the comment files (defaults to the number of CPUs).')
     
     args = parser.parse_args(args=None if sys.argv[1:] else ['--help'])
     
+    if not os.path.isdir(args.input):
+        print(f'{args.input} does not exist.')
+        sys.exit(1) # The input directory does not exist, stop execution
+    
     output_dir = args.output if args.output else args.input # output_dir = input_dir if not provided
+    os.makedirs(output_dir, exist_ok=True)
     
-    try:
-        decompress_zst_files(args.input, output_dir)
-    except NameError:
-        sys.exit(1) # The input directory does not exist, stop execution
+    if args.extract:
+        decompress_zst_files(args.input, output_dir, processes=args.processes)
     
-    comments_dir = os.path.join(output_dir, 'comments')
-        
-    json_data = process_comments_from_folder(comments_dir)
-    if args.keywords:
-        json_data = filter_comments(json_data, args.keywords)
+    # The .zst files are decompressed while they are processed, rather than read back from the extracted files
+    json_data = process_comments_from_folder(args.input, args.keywords, args.loose_match, args.processes)
         
     json_path = os.path.join(output_dir, 'extracted_comments.json' if not args.json_file_name else args.json_file_name + '.json')
-    with open(json_path, mode='w', encoding='utf-8') as out_file: 
-        for line in json_data:
-            out_file.write(line + '\n')
+    if args.compress:
+        json_path += '.zst'
+    write_comments(json_data, json_path, compress=args.compress)
    
\ No newline at end of file
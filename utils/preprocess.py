@@ -6,38 +6,56 @@ Date Modified: March 13th, 2025
 
 This file contains all the necessary functions used to preprocess the collected data.
 """
-import emoji
-import pandas as pd
+import functools
+import re
 from nltk.corpus import stopwords
 from nltk.stem import WordNetLemmatizer
 
+# URLs, emails and non-alphanumeric characters except whitespace, removed in one pass
+# With re.ASCII, \w and \s only match ASCII characters, so the last alternative also removes all non-ASCII characters (including emojis)
+_CLEAN_PATTERN = re.compile(r'https?://\S+|www\.\S+|\w+@\w+\.\w+|[^\w\s]', re.ASCII)
+_LEMMATIZER = WordNetLemmatizer()
+
+# Word frequencies are heavily skewed, so most words are lemmatized from the cache instead of looked up in WordNet again
+_lemmatize = functools.lru_cache(maxsize=200_000)(_LEMMATIZER.lemmatize)
+
+@functools.cache
+def _stop_words() -> frozenset[str]:
+    """
+    Loads the English stop words on first use, so that importing this file does not require the NLTK data.
+
+    Returns:
+        frozenset[str]: The English stop words.
+    """
+    return frozenset(stopwords.words('english'))
+
+def _clean_comment(comment: str) -> str:
+    """
+    Cleans a single comment in one pass over the string, rather than one pass over all comments per cleaning step.
+
+    Args:
+        comment (str): The comment to clean.
+
+    Returns:
+        str: The lowercased comment without non-ASCII characters, URLs, emails, emojis, punctuation and stop words, with each word lemmatized.
+    """
+    # Convert the text to lowercase
+    comment = comment.lower()
+
+    # Remove URLs, emails, punctuation, special characters and Unicode characters (non-ASCII)
+    comment = _CLEAN_PATTERN.sub('', comment)
+
+    # Remove stop words and apply lemmatization
+    stop_words = _stop_words()
+    return ' '.join(_lemmatize(word) for word in comment.split() if word not in stop_words)
+
 def clean_input(comments: list | dict) -> list:
     # Error checking
     if not comments:
-        raise ValueError('Expected list or dict of comments.')    
-    
-    # Convert comments list to Pandas DataFrame for easier manipulation
-    df = pd.DataFrame(comments, colums='comment')
-    data = df['comment']
-    
-    # Convert the text to lowercase
-    data = data.str.lower()
-    
-    # Remove Unicode characters (non-ASCII)
-    data = data.apply(lambda x: x.encode('ascii', 'ignore').decode('ascii'))
-    
-    # Remove punctuation, special characters, emails and links
-    data = data.replace(r'[^\w\s]', '', regex=True)  # Removes non-alphanumeric characters except whitespace
-    data = data.replace(r'http\S+|www\.\S+', '', regex=True)  # Remove URLs
-    data = data.replace(r'\w+@\w+\.com', '', regex=True)  # Remove emails
-    
-    # Convert emojis to text
-    data = data.apply(lambda x: emoji.demojize(x))
-    data = data.replace(r':(.*?):', '', regex=True)
-        
-    # Remove stop words and apply lemmatization
-    stop_words = set(stopwords.words('english'))
-    data = data.apply(lambda sentence: ' '.join(WordNetLemmatizer().lemmatize(word) for word in sentence.split() if word not in stop_words))
-    
-    return data.values
+        raise ValueError('Expected list or dict of comments.')
+
+    # Comments given as a dict are stored with their id as the key
+    if isinstance(comments, dict):
+        comments = comments.values()
 
+    return list(map(_clean_comment, comments))